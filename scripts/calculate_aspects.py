@@ -7,8 +7,11 @@ from typing import Any, Dict, List
 import swisseph as swe
 
 
+HARMONIC_ANGLES = tuple((harmonic, 360.0 / harmonic) for harmonic in (2, 3, 4, 5, 6, 8, 9, 12))
+
+
 def _is_valid_longitude(value: Any) -> bool:
-    return isinstance(value, (int, float)) and math.isfinite(float(value))
+    return isinstance(value, (int, float)) and math.isfinite(value)
 
 
 def _norm_diff(a: float, b: float) -> float:
@@ -18,17 +21,15 @@ def _norm_diff(a: float, b: float) -> float:
 
 def harmonic_aspects(positions: Dict[str, Dict[str, Any]], orb: float = 1.5) -> List[Dict[str, Any]]:
     aspects: List[Dict[str, Any]] = []
-    valid = {
-        k: v
+    # Validate and extract each longitude once; the pair loop below is O(n^2).
+    longitudes = {
+        k: float(v["longitude"])
         for k, v in positions.items()
         if _is_valid_longitude(v.get("longitude")) and v.get("category") not in {"fixed stars", "fixed_stars"}
     }
-    for left, right in combinations(valid.keys(), 2):
-        a = float(valid[left]["longitude"])
-        b = float(valid[right]["longitude"])
+    for (left, a), (right, b) in combinations(longitudes.items(), 2):
         diff = _norm_diff(a, b)
-        for harmonic in (2, 3, 4, 5, 6, 8, 9, 12):
-            angle = 360.0 / harmonic
+        for harmonic, angle in HARMONIC_ANGLES:
             if abs(diff - angle) <= orb:
                 aspects.append(
                     {
@@ -84,21 +85,21 @@ def arabic_parts(
 
 
 def fixed_star_conjunctions(positions: Dict[str, Dict[str, Any]], orb: float = 1.0) -> List[Dict[str, Any]]:
-    stars = {
-        k: v
-        for k, v in positions.items()
-        if v.get("category") in {"fixed stars", "fixed_stars"} and _is_valid_longitude(v.get("longitude"))
-    }
-    bodies = {
-        k: v
-        for k, v in positions.items()
-        if v.get("category") not in {"fixed stars", "fixed_stars"} and _is_valid_longitude(v.get("longitude"))
-    }
+    stars: Dict[str, float] = {}
+    bodies: Dict[str, float] = {}
+    for name, entry in positions.items():
+        lon = entry.get("longitude")
+        if not _is_valid_longitude(lon):
+            continue
+        if entry.get("category") in {"fixed stars", "fixed_stars"}:
+            stars[name] = float(lon)
+        else:
+            bodies[name] = float(lon)
 
     matches: List[Dict[str, Any]] = []
-    for body_name, body in bodies.items():
-        for star_name, star in stars.items():
-            delta = _norm_diff(float(body["longitude"]), float(star["longitude"]))
+    for body_name, body_lon in bodies.items():
+        for star_name, star_lon in stars.items():
+            delta = _norm_diff(body_lon, star_lon)
             if delta <= orb:
                 matches.append({"body": body_name, "fixed_star": star_name, "orb": delta})
     return matches
@@ -2,26 +2,26 @@ from __future__ import annotations
 
 import json
 import math
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
 import swisseph as swe
-from astroquery.jplhorizons import Horizons
 
-from scripts.utils.coords import ra_dec_to_ecl
+from scripts.sources import horizons_client, swiss_client
+from scripts.utils.cache import cache_get, cache_set
+from scripts.utils.coords import ra_dec_to_ecl, ra_dec_to_ecl_many
+from scripts.utils.http import POOL_SIZE, SESSION, share_session
+from scripts.utils.jsonio import read_json
 
 ROOT = Path(__file__).resolve().parents[1]
 CATALOG_PATH = ROOT / "config" / "celestial_catalog.json"
 FIXED_STARS_PATH = ROOT / "data" / "fixed_stars.json"
 ALT_FIXED_STARS_PATH = ROOT / "data" / "fixed_star_catalog.json"
 
-EPHEMERIS_PATH = ROOT / "ephemeris"
-if not EPHEMERIS_PATH.exists():
-    EPHEMERIS_PATH = ROOT / "ephe"
-swe.set_ephe_path(str(EPHEMERIS_PATH))
 
 SWISS_CODES = {
     "sun": swe.SUN,
@@ -40,8 +40,21 @@ SWISS_CODES = {
     "juno": swe.JUNO,
     "vesta": swe.VESTA,
 }
+# Longitude speed feeds the "velocity" field, so speeds stay on.
+SWISS_FLAGS = swe.FLG_SPEED
 
 MIRIADE_BASE = "https://ssp.imcce.fr/webservices/miriade/api/ephemcc.php"
+# Bodies Swiss Ephemeris covers well enough that a Horizons round-trip first
+# is wasted latency; the remote providers stay on as fallbacks. Note that
+# "velocity" follows the provider (Swiss deg/day vs Horizons km/s); see README.
+PREFER_SWISS = {"Sun", "Chiron"}
+# Sun through Pluto are fully covered by the bundled Swiss files; with local
+# majors enabled they are computed offline and never touch the network first.
+MAJOR_BODIES = {
+    "Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter",
+    "Saturn", "Uranus", "Neptune", "Pluto",
+}
+_local_majors = False
 HORIZONS_BODIES = [
     "Moon", "Mercury", "Venus", "Mars", "Jupiter", "Saturn",
     "Uranus", "Neptune", "Pluto",
@@ -72,11 +85,19 @@ ASTEROID_MIRIADE_IDS = {
     "Merlin": "2598",
 }
 
-HORIZONS_API = "https://ssd.jpl.nasa.gov/api/horizons.api"
+# Only the columns read below: 20 = delta, 22 = vel_obs, 31 = observer
+# ecliptic lon/lat of date (the same frame as the Swiss fallback).
+# The astroquery default asks for all 43 quantity groups.
+HORIZONS_QUANTITIES = "20,22,31"
+
+
+def set_local_majors(enabled: bool) -> None:
+    global _local_majors
+    _local_majors = enabled
 
 
 def _is_valid_number(value: Any) -> bool:
-    return isinstance(value, (int, float)) and math.isfinite(float(value))
+    return isinstance(value, (int, float)) and math.isfinite(value)
 
 
 def _normalize_minor_body_id(value: Any) -> Optional[str]:
@@ -121,14 +142,17 @@ def _miriade_identifiers(body: Dict[str, Any]) -> List[str]:
 
 
 def load_catalog(path: Path = CATALOG_PATH) -> Dict[str, Any]:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return read_json(path)
 
 
+# Every body, provider attempt and star for a run shares the same instant, so
+# the ISO string and Julian day are derived once per datetime.
+@lru_cache(maxsize=64)
 def _utc_iso(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
+@lru_cache(maxsize=64)
 def _to_jd(dt: datetime) -> float:
     dt_utc = dt.astimezone(timezone.utc)
     return swe.julday(
@@ -140,107 +164,68 @@ def _to_jd(dt: datetime) -> float:
 
 
 def _horizons_position(body: Dict[str, Any], dt: datetime) -> Optional[Dict[str, float]]:
-    prefetched = body.get("_horizons_prefetch")
-    if isinstance(prefetched, dict) and body["name"] in prefetched:
-        return prefetched[body["name"]]
-
     body_id = body.get("horizons_id") or body["name"]
     id_type = body.get("horizons_id_type")
+    epoch_jd = _to_jd(dt)
+    cache_key = [str(body_id), id_type, horizons_client.cache_epoch(epoch_jd)]
+    cached = cache_get("horizons", cache_key, max_age_s=horizons_client.CACHE_TTL_S)
+    if cached is not None:
+        return cached
+
+    row = None
+    # astroquery rewrites the COMMAND for other id types; leave those to it.
+    if id_type in (None, "majorbody"):
+        try:
+            rows = horizons_client.query_observer(str(body_id), HORIZONS_QUANTITIES, TLIST=str(epoch_jd))
+        except ValueError:
+            rows = []
+        lonlat = horizons_client.ecliptic_lonlat(rows[0]) if rows else None
+        if lonlat is not None:
+            # astroquery fills "n.a." with 0; do the same so either path caches alike.
+            row = {
+                "lon": lonlat[0],
+                "lat": lonlat[1],
+                "delta": horizons_client.float_or_none(rows[0].get("delta")) or 0.0,
+                "vel_obs": horizons_client.float_or_none(rows[0].get("VmagOb")) or 0.0,
+            }
+    if row is None:
+        row = _horizons_observer_row_astroquery(body_id, id_type, epoch_jd)
+    if row is None:
+        return None
+
+    lon, lat = row["lon"], row["lat"]
+    if not _is_valid_number(lon) or not _is_valid_number(lat):
+        return None
+
+    position = {"longitude": lon % 360.0, "latitude": lat, "distance": row["delta"], "velocity": row["vel_obs"]}
+    cache_set("horizons", cache_key, position)
+    return position
+
+
+def _horizons_observer_row_astroquery(body_id: Any, id_type: Optional[str], epoch_jd: float) -> Optional[Dict[str, float]]:
+    # astroquery pulls in astropy/ERFA; only pay for it when the raw response
+    # could not be read.
+    from astroquery.jplhorizons import Horizons
+
     kwargs: Dict[str, Any] = {
         "id": body_id,
         "location": "500@399",
-        "epochs": [_to_jd(dt)],
+        "epochs": [epoch_jd],
     }
     if id_type:
         kwargs["id_type"] = id_type
 
-    eph = Horizons(**kwargs).ephemerides()
-
-    lon, lat = None, None
-    for key in ("EclLon", "EclipticLon", "ELON"):
-        if key in eph.colnames:
-            lon = float(eph[key][0])
-            break
-    for key in ("EclLat", "EclipticLat", "ELAT"):
-        if key in eph.colnames:
-            lat = float(eph[key][0])
-            break
-
-    if (lon is None or lat is None) and {"RA", "DEC"}.issubset(eph.colnames):
-        lon, lat = ra_dec_to_ecl(float(eph["RA"][0]), float(eph["DEC"][0]), _utc_iso(dt))
-
-    if not _is_valid_number(lon) or not _is_valid_number(lat):
+    eph = share_session(Horizons(**kwargs)).ephemerides(quantities=HORIZONS_QUANTITIES)
+    # astroquery renames quantity 31 to ObsEclLon/ObsEclLat; its EclLon/EclLat
+    # are the heliocentric quantity-18 columns, not what is wanted here.
+    if not {"ObsEclLon", "ObsEclLat"}.issubset(eph.colnames):
         return None
-
-    distance = float(eph["delta"][0]) if "delta" in eph.colnames else 0.0
-    velocity = float(eph["vel_obs"][0]) if "vel_obs" in eph.colnames else 0.0
-    return {"longitude": lon % 360.0, "latitude": lat, "distance": distance, "velocity": velocity}
-
-
-def _parse_horizons_vector_batch(text: str, name_by_command: Dict[str, str]) -> Dict[str, Dict[str, float]]:
-    parsed: Dict[str, Dict[str, float]] = {}
-    current_name: Optional[str] = None
-    in_block = False
-    for raw in text.splitlines():
-        line = raw.strip()
-        if line.startswith("Target body name:"):
-            current_name = None
-            for command, body_name in name_by_command.items():
-                if f"({command})" in line:
-                    current_name = body_name
-                    break
-            continue
-        if line == "$$SOE":
-            in_block = True
-            continue
-        if line == "$$EOE":
-            in_block = False
-            continue
-        if not in_block or current_name is None:
-            continue
-        if line.startswith("X ="):
-            tokens = line.replace("=", " ").split()
-            try:
-                x = float(tokens[tokens.index("X") + 1])
-                y = float(tokens[tokens.index("Y") + 1])
-                z = float(tokens[tokens.index("Z") + 1])
-                lon = math.degrees(math.atan2(y, x)) % 360.0
-                lat = math.degrees(math.atan2(z, math.sqrt(x * x + y * y)))
-                parsed[current_name] = {
-                    "longitude": lon,
-                    "latitude": lat,
-                    "distance": math.sqrt(x * x + y * y + z * z),
-                    "velocity": 0.0,
-                }
-            except (ValueError, IndexError):
-                continue
-    return parsed
-
-
-def _horizons_batch_positions(bodies: List[Dict[str, Any]], dt: datetime) -> Dict[str, Dict[str, float]]:
-    if not bodies:
-        return {}
-    command_by_name: Dict[str, str] = {}
-    name_by_command: Dict[str, str] = {}
-    for body in bodies:
-        command = str(body.get("horizons_id") or body["name"]).rstrip(";")
-        command_by_name[body["name"]] = command
-        name_by_command[command] = body["name"]
-
-    command_list = ",".join(command_by_name.values())
-    params = {
-        "format": "text",
-        "COMMAND": f"'{command_list}'",
-        "CENTER": "'500@0'",
-        "TABLE_TYPE": "'VECTOR'",
-        "REF_PLANE": "'ECLIPTIC'",
-        "START_TIME": f"'{_utc_iso(dt)}'",
-        "STOP_TIME": f"'{_utc_iso(dt)}'",
-        "STEP_SIZE": "'1d'",
+    return {
+        "lon": float(eph["ObsEclLon"][0]),
+        "lat": float(eph["ObsEclLat"][0]),
+        "delta": float(eph["delta"][0]) if "delta" in eph.colnames else 0.0,
+        "vel_obs": float(eph["vel_obs"][0]) if "vel_obs" in eph.colnames else 0.0,
     }
-    response = requests.get(HORIZONS_API, params=params, timeout=30)
-    response.raise_for_status()
-    return _parse_horizons_vector_batch(response.text, name_by_command)
 
 
 def _miriade_position(body: Dict[str, Any], dt: datetime) -> Optional[Dict[str, float]]:
@@ -277,7 +262,7 @@ def _miriade_position(body: Dict[str, Any], dt: datetime) -> Optional[Dict[str,
         "-nbd": "1",
         "-mime": "json",
     }
-    response = requests.get(MIRIADE_BASE, params=params, timeout=20)
+    response = SESSION.get(MIRIADE_BASE, params=params, timeout=20)
     try:
         response.raise_for_status()
     except requests.HTTPError:
@@ -323,20 +308,21 @@ def _swiss_position(body: Dict[str, Any], dt: datetime) -> Optional[Dict[str, fl
     if code is None:
         return None
 
-    result, _ = swe.calc_ut(_to_jd(dt), int(code), swe.FLG_SPEED)
-    lon, lat, distance, lon_speed = result[0], result[1], result[2], result[3]
+    # calc_ut already returns Python floats.
+    result, _ = swe.calc_ut(_to_jd(dt), int(code), SWISS_FLAGS)
+    lon, lat, distance, lon_speed = result[:4]
     return {
-        "longitude": float(lon) % 360.0,
-        "latitude": float(lat),
-        "distance": float(distance),
-        "velocity": float(lon_speed),
+        "longitude": lon % 360.0,
+        "latitude": lat,
+        "distance": distance,
+        "velocity": lon_speed,
     }
 
 
 def _normalize_provider_priority(body: Dict[str, Any], category: str) -> List[str]:
     name = body["name"]
-    if name == "Sun":
-        return ["swiss"]
+    if name in PREFER_SWISS or (_local_majors and name in MAJOR_BODIES):
+        return ["swiss", "horizons", "miriade"]
     if name in HORIZONS_BODIES:
         return ["horizons", "miriade", "swiss"]
     if name in MIRIADE_BODIES:
@@ -396,23 +382,6 @@ def _compute_single(provider: str, body: Dict[str, Any], dt: datetime) -> Dict[s
         }
 
 
-def _fetch_group(
-    provider: str,
-    bodies: List[Dict[str, Any]],
-    dt: datetime,
-) -> Dict[str, Dict[str, Any]]:
-    if not bodies:
-        return {}
-
-    results: Dict[str, Dict[str, Any]] = {}
-    max_workers = min(8, len(bodies))
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(_compute_single, provider, body, dt) for body in bodies]
-        for future in as_completed(futures):
-            results.update(future.result())
-    return results
-
-
 def _compute_aether_points(
     positions: Dict[str, Dict[str, Any]],
     aether_bodies: List[Dict[str, Any]],
@@ -493,15 +462,23 @@ def _resolve_body(body: Dict[str, Any], dt: datetime) -> Dict[str, Any]:
     }
 
 
-def fetch_all_positions(dt: datetime, catalog: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    catalog_data = catalog or load_catalog()
-    categories = catalog_data.get("categories", {})
+def _resolve_all(jobs: List[Tuple[Dict[str, Any], datetime]]) -> List[Dict[str, Any]]:
+    if not jobs:
+        return []
+    # Each (body, instant) walks its provider chain independently and the work
+    # is network-bound, so fan out; map() keeps job order for the merge below.
+    with ThreadPoolExecutor(max_workers=min(POOL_SIZE, len(jobs)), initializer=swiss_client.init_thread) as executor:
+        return list(executor.map(lambda job: _resolve_body(*job), jobs))
 
+
+def _catalog_bodies(
+    catalog_data: Dict[str, Any],
+) -> Tuple[List[Dict[str, Any]], set[str], List[Dict[str, Any]]]:
     all_bodies: List[Dict[str, Any]] = []
     fixed_star_names: set[str] = set()
     aether_bodies: List[Dict[str, Any]] = []
 
-    for category, objects in categories.items():
+    for category, objects in catalog_data.get("categories", {}).items():
         for body in objects:
             enriched = dict(body)
             enriched.setdefault("category", category)
@@ -515,11 +492,40 @@ def fetch_all_positions(dt: datetime, catalog: Optional[Dict[str, Any]] = None)
                 aether_bodies.append(enriched)
                 continue
             all_bodies.append(enriched)
+    return all_bodies, fixed_star_names, aether_bodies
+
+
+@lru_cache(maxsize=1)
+def _fixed_star_catalog() -> Tuple[Dict[str, Any], ...]:
+    # The catalog file is static; read it once per process rather than once
+    # per instant assembled.
+    stars_path = ALT_FIXED_STARS_PATH if ALT_FIXED_STARS_PATH.exists() else FIXED_STARS_PATH
+    if not stars_path.exists():
+        return ()
+    return tuple(read_json(stars_path).get("stars", []))
+
+
+@lru_cache(maxsize=4)
+def _fixed_star_lonlats(names: frozenset[str]) -> Tuple[Tuple[str, float, float], ...]:
+    # Catalog positions are J2000 and don't depend on the instant, so every
+    # instant assembled in a run reuses one conversion.
+    stars = [star for star in _fixed_star_catalog() if star["id"] in names]
+    lons, lats = ra_dec_to_ecl_many(
+        [star["ra_deg"] for star in stars],
+        [star["dec_deg"] for star in stars],
+    )
+    return tuple(zip([star["id"] for star in stars], lons.tolist(), lats.tolist()))
+
 
+def _assemble_positions(
+    resolved: List[Dict[str, Any]],
+    fixed_star_names: set[str],
+    aether_bodies: List[Dict[str, Any]],
+    dt: datetime,
+) -> Dict[str, Any]:
     positions: Dict[str, Dict[str, Any]] = {}
-    for body in all_bodies:
-        resolved = _resolve_body(body, dt)
-        for name, candidate in resolved.items():
+    for entry in resolved:
+        for name, candidate in entry.items():
             existing = positions.get(name)
             if existing is None:
                 positions[name] = candidate
@@ -530,15 +536,9 @@ def fetch_all_positions(dt: datetime, catalog: Optional[Dict[str, Any]] = None)
             if candidate_ok and not existing_ok:
                 positions[name] = candidate
 
-    stars_path = ALT_FIXED_STARS_PATH if ALT_FIXED_STARS_PATH.exists() else FIXED_STARS_PATH
-    if stars_path.exists() and fixed_star_names:
-        with stars_path.open("r", encoding="utf-8") as f:
-            stars = json.load(f).get("stars", [])
-        for star in stars:
-            if star["id"] not in fixed_star_names:
-                continue
-            lon, lat = ra_dec_to_ecl(star["ra_deg"], star["dec_deg"], _utc_iso(dt))
-            positions[star["id"]] = {
+    if fixed_star_names:
+        for star_id, lon, lat in _fixed_star_lonlats(frozenset(fixed_star_names)):
+            positions[star_id] = {
                 "longitude": lon,
                 "latitude": lat,
                 "distance": 0.0,
@@ -552,6 +552,22 @@ def fetch_all_positions(dt: datetime, catalog: Optional[Dict[str, Any]] = None)
     return positions
 
 
+def fetch_positions_for(dts: List[datetime], catalog: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    # Every (body, instant) pair shares one worker pool, so a slow lookup for
+    # one instant doesn't hold back the start of the next.
+    all_bodies, fixed_star_names, aether_bodies = _catalog_bodies(catalog or load_catalog())
+    resolved = _resolve_all([(body, dt) for dt in dts for body in all_bodies])
+    n = len(all_bodies)
+    return [
+        _assemble_positions(resolved[i * n:(i + 1) * n], fixed_star_names, aether_bodies, dt)
+        for i, dt in enumerate(dts)
+    ]
+
+
+def fetch_all_positions(dt: datetime, catalog: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return fetch_positions_for([dt], catalog)[0]
+
+
 if __name__ == "__main__":
     now = datetime.now(timezone.utc)
     print(json.dumps(fetch_all_positions(now), indent=2))
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 import os
-import json
 import datetime
+from pathlib import Path
+import numpy as np
 import pytz
-from astroquery.jplhorizons import Horizons
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from scripts.sources import horizons_client
+from scripts.utils.http import POOL_SIZE
+from scripts.utils.jsonio import write_json_stream
 
 # --- Dual import: Linux (swisseph) vs Windows (pyswisseph) ---
 try:
@@ -17,14 +22,8 @@ swe.set_ephe_path(EPHE_PATH)
 if not os.path.exists(EPHE_PATH):
     raise RuntimeError(f"❌ Swiss ephemeris path not found: {EPHE_PATH}")
 
-# --- Planet and body IDs ---
-JPL_IDS = {
-    "Sun": 10, "Moon": 301, "Mercury": 199, "Venus": 299,
-    "Mars": 499, "Jupiter": 599, "Saturn": 699,
-    "Uranus": 799, "Neptune": 899, "Pluto": 999,
-    "Chiron": 2060, "Ceres": 1, "Pallas": 2, "Juno": 3, "Vesta": 4
-}
 
+# --- Planet and body IDs ---
 SWISS_IDS = {
     "Sun": swe.SUN, "Moon": swe.MOON, "Mercury": swe.MERCURY,
     "Venus": swe.VENUS, "Mars": swe.MARS, "Jupiter": swe.JUPITER,
@@ -34,13 +33,21 @@ SWISS_IDS = {
     "Juno": swe.JUNO, "Vesta": swe.VESTA
 }
 
+# Feed order, with each body's Swiss id resolved once up front.
+BODIES = tuple(SWISS_IDS.items())
+
 FIXED_STAR_FILE = "sefstars.txt"
 
+# Only longitude/latitude are used, so skip Swiss's speed computation.
+SWISS_FLAGS = swe.FLG_SWIEPH
+
 
 # ------------------------------------------------------------
 #  Fixed star loader
 # ------------------------------------------------------------
+@lru_cache(maxsize=1)
 def get_fixed_stars():
+    # The catalog is fixed for the run; parse it once however often it is asked for.
     stars = {}
     if not os.path.exists(FIXED_STAR_FILE):
         return stars
@@ -65,118 +72,169 @@ def get_fixed_stars():
 # ------------------------------------------------------------
 #  Swiss ephemeris calculator
 # ------------------------------------------------------------
-def swe_calc(body, dt):
-    jd = swe.julday(
+def julian_day(dt):
+    return swe.julday(
         dt.year, dt.month, dt.day,
         dt.hour + dt.minute / 60.0 + dt.second / 3600.0
     )
-    result = swe.calc_ut(jd, SWISS_IDS[body])
 
-    # Linux swisseph: ((lon, lat, dist, speed...), retflag)
-    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], (list, tuple)):
-        lon, lat, dist, *_ = result[0]
-        return lon % 360.0, lat
 
+def _swiss_result_is_nested():
+    # Linux swisseph: ((lon, lat, dist, speed...), retflag)
     # Windows pyswisseph: (lon, lat, dist, speed...)
+    # The shape is fixed per build, so probe it once instead of on every call.
+    result = swe.calc_ut(2451545.0, swe.SUN, SWISS_FLAGS)
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], (list, tuple)):
+        return True
     if isinstance(result, (list, tuple)) and len(result) >= 3:
-        lon, lat, dist, *_ = result
-        return lon % 360.0, lat
-
+        return False
     raise RuntimeError(f"❌ Unexpected Swiss return format: {result}")
 
 
+SWISS_NESTED = _swiss_result_is_nested()
+
+
+def swe_calc(sid, jd):
+    result = swe.calc_ut(jd, sid, SWISS_FLAGS)
+    if SWISS_NESTED:
+        result = result[0]
+    return result[0] % 360.0, result[1]
+
+
 # ------------------------------------------------------------
 #  JPL Horizons fetch
 # ------------------------------------------------------------
-def get_jpl_ephemeris(body, dt):
+# Horizons echoes each epoch's JD to 9 decimals; a row counts for a day when
+# it lands within a second of that day's requested JD.
+JPL_JD_TOLERANCE = 1.0 / 86400.0
+
+
+def query_jpl_ecliptic(body, first_jd, last_jd, step_days):
+    # The grid is evenly spaced, so it goes as one start/stop/step range
+    # rather than an explicit epoch list. Ids come from the same table the
+    # overlay feed uses.
+    return horizons_client.query_ecliptic(
+        horizons_client.HORIZONS_IDS[body.upper()],
+        START_TIME=f"'JD {first_jd!r}'",
+        STOP_TIME=f"'JD {last_jd!r}'",
+        STEP_SIZE=f"'{step_days} d'",
+    )
+
+
+def get_jpl_ephemeris(body, jds, step_days):
+    # One Horizons request covers the body's whole window; returns (lon, lat)
+    # per JD, or None where Horizons had no usable value. On any failure
+    # (after the session's own retries) every day falls back to Swiss.
     try:
-        obj = Horizons(id=JPL_IDS[body], location="500@399",
-                       epochs=dt.strftime("%Y-%m-%d %H:%M"),
-                       id_type=None)
-        eph = obj.ephemerides()
-        if len(eph) == 0:
-            return None
-        lon = float(eph["EclLon"][0])
-        lat = float(eph["EclLat"][0])
-        return lon, lat
-    except Exception:
-        return None
+        rows = query_jpl_ecliptic(body, jds[0], jds[-1], step_days)
+    except Exception as e:
+        print(f"⚠️ Horizons failed for {body}: {e}; all {len(jds)} days use Swiss")
+        return [None] * len(jds)
+
+    # Place rows by their own JD rather than by position, so a missing or
+    # extra row only sends its own day to Swiss, not the whole window.
+    coords = [None] * len(jds)
+    for row_jd, lonlat in rows:
+        if row_jd is None:
+            continue
+        i = round((row_jd - jds[0]) / step_days)
+        if 0 <= i < len(jds) and abs(row_jd - jds[i]) <= JPL_JD_TOLERANCE:
+            coords[i] = lonlat
+    matched = sum(lonlat is not None for lonlat in coords)
+    if matched < len(jds):
+        print(f"⚠️ Horizons gave {matched}/{len(jds)} days for {body} "
+              f"({len(rows)} rows); the rest use Swiss")
+    return coords
 
 
 # ------------------------------------------------------------
 #  Position getter for each body
 # ------------------------------------------------------------
-def get_positions(dt):
-    result = {}
-    for body in JPL_IDS.keys():
-        coords = get_jpl_ephemeris(body, dt)
-        if coords:  # JPL success
-            result[body] = (coords[0], coords[1], "jpl")
-        else:  # fallback to Swiss
-            try:
-                lon, lat = swe_calc(body, dt)
-                result[body] = (lon, lat, "swiss")
-            except Exception as e:
-                raise RuntimeError(f"❌ Swiss failed for {body} on {dt}: {e}")
-    return result
+def get_body_position(body, sid, day_key, jd, coords):
+    if coords:  # JPL success
+        return coords[0], coords[1], "jpl"
+    try:  # fallback to Swiss
+        lon, lat = swe_calc(sid, jd)
+        return lon, lat, "swiss"
+    except Exception as e:
+        raise RuntimeError(f"❌ Swiss failed for {body} on {day_key}: {e}")
+
+
+# ------------------------------------------------------------
+#  Daily rows
+# ------------------------------------------------------------
+def iter_days(start, end, step_days, stars, executor):
+    # Samples sit whole days apart, so one julday() for start plus offsets
+    # gives every Julian day, and date ordinals give every day key; no
+    # per-day datetime arithmetic. The same JD serves Horizons and Swiss.
+    n_days = (end - start) // datetime.timedelta(days=step_days) + 1
+    offsets = step_days * np.arange(n_days)
+    jds = (julian_day(start) + offsets).tolist()
+    first_day = start.toordinal()
+    day_keys = [datetime.date.fromordinal(first_day + k).isoformat() for k in offsets.tolist()]
+
+    # Each body's whole window is one Horizons request instead of one per
+    # day; bodies are fetched concurrently over the shared session.
+    jpl = dict(zip(SWISS_IDS, executor.map(lambda body: get_jpl_ephemeris(body, jds, step_days), SWISS_IDS)))
+
+    # Fixed-star rows are the same every day; build them once and have every
+    # day refer to the same row objects (they are only read when written).
+    star_rows = {
+        star: {
+            "ecl_lon_deg": lon,
+            "ecl_lat_deg": lat,
+            "source": src
+        }
+        for star, (lon, lat, src) in stars.items()
+    }
+
+    for i, (day_key, jd) in enumerate(zip(day_keys, jds)):
+        day = {}
+        for body, sid in BODIES:
+            lon, lat, src = get_body_position(body, sid, day_key, jd, jpl[body][i])
+            day[body] = {
+                "ecl_lon_deg": lon,
+                "ecl_lat_deg": lat,
+                "source": src
+            }
+
+        day.update(star_rows)
+
+        yield day_key, day
 
 
 # ------------------------------------------------------------
 #  Main generator
 # ------------------------------------------------------------
 def main():
-    # Dynamic 6-month window starting from "now"
+    # Dynamic 6-month window starting from "now"; one timestamp for the
+    # whole run so the meta fields and the filename agree.
     now = datetime.datetime.now(pytz.UTC)
+    pacific = now.astimezone(pytz.timezone("America/Los_Angeles"))
     start = now
     end = now + datetime.timedelta(days=182)  # ≈ 6 months
     step_days = 1  # daily sampling
 
     # Meta header
-    data = {
-        "meta": {
-            "generated_at_utc": datetime.datetime.utcnow().replace(tzinfo=pytz.UTC).isoformat(),
-            "generated_at_pacific": datetime.datetime.now(pytz.timezone("America/Los_Angeles")).isoformat(),
-            "type": "6-month overlay",
-            "range_utc": [start.isoformat(), end.isoformat()],
-            "range": f"{start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}",
-            "source_order": ["jpl", "swiss", "fixed"]
-        },
-        "transits": {}
+    meta = {
+        "generated_at_utc": now.isoformat(),
+        "generated_at_pacific": pacific.isoformat(),
+        "type": "6-month overlay",
+        "range_utc": [start.isoformat(), end.isoformat()],
+        "range": f"{start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}",
+        "source_order": ["jpl", "swiss", "fixed"]
     }
 
     stars = get_fixed_stars()
 
-    # Build daily data
-    dt = start
-    while dt <= end:
-        day_key = dt.strftime("%Y-%m-%d")
-        data["transits"][day_key] = {}
-        positions = get_positions(dt)
-
-        for body, (lon, lat, src) in positions.items():
-            data["transits"][day_key][body] = {
-                "ecl_lon_deg": lon,
-                "ecl_lat_deg": lat,
-                "source": src
-            }
-
-        for star, (lon, lat, src) in stars.items():
-            data["transits"][day_key][star] = {
-                "ecl_lon_deg": lon,
-                "ecl_lat_deg": lat,
-                "source": src
-            }
-
-        dt += datetime.timedelta(days=step_days)
-
     # Filename & output path
-    pacific = datetime.datetime.now(pytz.timezone("America/Los_Angeles"))
     filename = f"feed_overlay_6month_{pacific.strftime('%b-%d-%Y_%I-%M%p')}_Pacific.json"
     outpath = os.path.join("docs", filename)
 
-    os.makedirs("docs", exist_ok=True)
-    with open(outpath, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    # Days are written as they are computed rather than held for one dump.
+    with ThreadPoolExecutor(max_workers=POOL_SIZE) as executor:
+        days = iter_days(start, end, step_days, stars, executor)
+        write_json_stream(Path(outpath), {"meta": meta}, "transits", days)
 
     print(f"✅ 6-month feed written to {outpath}")
 
@@ -1,18 +1,24 @@
-import json, os, sys, math
+import json, os, shutil, sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime, timezone
 from typing import Dict, Any
 from math import fmod
+from pathlib import Path
+import numpy as np
 import swisseph as swe
 from dateutil import parser
 import pytz
 from scripts.sources import horizons_client, swiss_client, miriade_client
-from scripts.utils.coords import ra_dec_to_ecl
+from scripts.utils.coords import ra_dec_to_ecl_many
+from scripts.utils.epochs import julday_from_iso
+from scripts.utils.http import POOL_SIZE
+from scripts.utils.jsonio import write_json_stream
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
 DATA = os.path.join(ROOT, "data")
 NATAL = os.path.join("config", "natal", "3_combined_kitchen_sink.json")
-
-swe.set_ephe_path(os.path.join(ROOT, "ephe"))
+FEED_NOW = os.path.join("docs", "feed_now.json")
 
 NAME_ALIASES = {
     "Sun": ["Sun", "SUN"],
@@ -51,34 +57,50 @@ def compute_arabic_parts(asc, sun, moon):
     return parts
 
 # Houses
-def compute_house_cusps(lat, lon, when_iso, hsys="P"):
-    dt = parser.isoparse(when_iso)
-    jd = swe.julday(dt.year, dt.month, dt.day,
-                    dt.hour + dt.minute/60.0 + dt.second/3600.0)
+# Placidus by default; OVERLAY_HOUSE_SYSTEM picks another Swiss code, e.g.
+# "W" (whole sign) or "E" (equal), which are closed-form and cheaper.
+HOUSE_SYSTEM = os.environ.get("OVERLAY_HOUSE_SYSTEM", "P")
+
+# Enough names for Gauquelin's 36 sectors; zip() stops at the cusps returned.
+HOUSE_KEYS = tuple(f"House_{i}" for i in range(1, 37))
+
+def compute_house_cusps(lat, lon, jd, hsys=HOUSE_SYSTEM):
     cusps, ascmc = swe.houses(jd, lat, lon, hsys.encode("utf-8"))
-    houses = {f"House_{i}": {"ecl_lon_deg": cusp, "ecl_lat_deg": 0.0, "used_source": f"houses-{hsys}"} 
-              for i, cusp in enumerate(cusps, start=1)}
+    source = f"houses-{hsys}"
+    houses = {key: {"ecl_lon_deg": cusp, "ecl_lat_deg": 0.0, "used_source": source}
+              for key, cusp in zip(HOUSE_KEYS, cusps)}
     houses["ASC"] = {"ecl_lon_deg": ascmc[0], "ecl_lat_deg": 0.0, "used_source": "houses"}
     houses["MC"] = {"ecl_lon_deg": ascmc[1], "ecl_lat_deg": 0.0, "used_source": "houses"}
     return houses
 
 # Harmonics
 def compute_harmonics(base_positions: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    # Every body's 8th and 9th harmonic in two array passes rather than
+    # per-body Python arithmetic.
+    bodies = [body for body, pos in base_positions.items() if pos["ecl_lon_deg"] is not None]
+    lons = np.array([base_positions[body]["ecl_lon_deg"] for body in bodies], dtype=float)
+    h8_lons = np.fmod(np.mod(lons * 8, 360) + 360.0, 360.0).tolist()
+    h9_lons = np.fmod(np.mod(lons * 9, 360) + 360.0, 360.0).tolist()
     harmonics = {}
-    for body, pos in base_positions.items():
-        if pos["ecl_lon_deg"] is None:
-            continue
-        lon = pos["ecl_lon_deg"]
-        harmonics[f"{body}_h8"] = {"ecl_lon_deg": normalize(lon*8 % 360), "ecl_lat_deg": 0.0, "used_source": "harmonic8"}
-        harmonics[f"{body}_h9"] = {"ecl_lon_deg": normalize(lon*9 % 360), "ecl_lat_deg": 0.0, "used_source": "harmonic9"}
+    for body, lon8, lon9 in zip(bodies, h8_lons, h9_lons):
+        harmonics[f"{body}_h8"] = {"ecl_lon_deg": lon8, "ecl_lat_deg": 0.0, "used_source": "harmonic8"}
+        harmonics[f"{body}_h9"] = {"ecl_lon_deg": lon9, "ecl_lat_deg": 0.0, "used_source": "harmonic9"}
     return harmonics
 
 # Resolver with debug
 def resolve_body(name, sources, when_iso, force_fallback=False):
     got, used = None, None
     aliases = NAME_ALIASES.get(name, [name])
+    # Horizons/Swiss upper-case the name, so "Sun" then "SUN" repeats the same
+    # failing request (and Miriade's prefix table only knows the canonical
+    # spelling); try each (source, name) pair once.
+    tried = set()
     for alias in aliases:
         for label, func in sources:
+            key = (label, alias.upper())
+            if key in tried:
+                continue
+            tried.add(key)
             try:
                 pos = func(alias, when_iso)
             except Exception as e:
@@ -98,59 +120,55 @@ def resolve_body(name, sources, when_iso, force_fallback=False):
             "ecl_lat_deg": None if not got else float(got[1]),
             "used_source": "missing" if not used else used}
 
+MAJORS = ["Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter",
+          "Saturn", "Uranus", "Neptune", "Pluto", "Chiron"]
+ASTEROIDS = ["Ceres", "Pallas", "Juno", "Vesta", "Psyche", "Amor",
+             "Eros", "Astraea", "Sappho", "Karma", "Bacchus", "Hygiea", "Nessus"]
+TNOs = ["Eris", "Sedna", "Haumea", "Makemake", "Varuna", "Ixion",
+        "Typhon", "Salacia", "2002 AW197", "2003 VS2", "Orcus", "Quaoar"]
+AETHERS = ["Vulcan", "Persephone", "Hades", "Proserpina", "Isis"]
+
+JPL_FIRST = [
+    ("jpl", horizons_client.get_ecliptic_lonlat),
+    ("swiss", swiss_client.get_ecliptic_lonlat),
+    ("miriade", miriade_client.get_ecliptic_lonlat)
+]
+
+# Flat (name, sources) list resolved in one pass:
+# Sun → Horizons first, fallback Swiss; Aethers → Swiss only.
+TARGETS = (
+    [("Sun", JPL_FIRST[:2])]
+    + [(name, JPL_FIRST) for name in MAJORS + ASTEROIDS + TNOs if name != "Sun"]
+    + [(name, [("swiss", swiss_client.get_ecliptic_lonlat)]) for name in AETHERS]
+)
+
+@lru_cache(maxsize=None)
+def fixed_star_lonlats():
+    # J2000 catalog positions don't depend on the chart or the time, so the
+    # conversion runs once per process and every chart reuses it.
+    stars = load_json(os.path.join(DATA, "fixed_stars.json"))["stars"]
+    lams, bets = ra_dec_to_ecl_many([s["ra_deg"] for s in stars], [s["dec_deg"] for s in stars])
+    return tuple(zip([s["id"] for s in stars], lams.tolist(), bets.tolist()))
+
+@lru_cache(maxsize=4)
+def resolve_targets(when_iso):
+    # Body positions depend only on the instant, not the chart, so every chart
+    # in a run shares one resolution pass instead of re-querying each source.
+    # Bodies resolve independently over the network; map() keeps TARGETS order.
+    with ThreadPoolExecutor(max_workers=POOL_SIZE, initializer=swiss_client.init_thread) as executor:
+        resolved = executor.map(
+            lambda target: resolve_body(target[0], target[1], when_iso, force_fallback=True),
+            TARGETS)
+        return tuple((name, pos) for (name, _), pos in zip(TARGETS, resolved))
+
 def compute_positions(when_iso, lat, lon):
-    out = {}
-    MAJORS = ["Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter",
-              "Saturn", "Uranus", "Neptune", "Pluto", "Chiron"]
-    ASTEROIDS = ["Ceres", "Pallas", "Juno", "Vesta", "Psyche", "Amor",
-                 "Eros", "Astraea", "Sappho", "Karma", "Bacchus", "Hygiea", "Nessus"]
-    TNOs = ["Eris", "Sedna", "Haumea", "Makemake", "Varuna", "Ixion",
-            "Typhon", "Salacia", "2002 AW197", "2003 VS2", "Orcus", "Quaoar"]
-    AETHERS = ["Vulcan", "Persephone", "Hades", "Proserpina", "Isis"]
-
-    # Sun → Horizons first, fallback Swiss
-    out["Sun"] = resolve_body("Sun", [
-        ("jpl", horizons_client.get_ecliptic_lonlat),
-        ("swiss", swiss_client.get_ecliptic_lonlat)
-    ], when_iso, force_fallback=True)
-
-    # Other majors
-    for name in MAJORS:
-        if name == "Sun": continue
-        out[name] = resolve_body(name, [
-            ("jpl", horizons_client.get_ecliptic_lonlat),
-            ("swiss", swiss_client.get_ecliptic_lonlat),
-            ("miriade", miriade_client.get_ecliptic_lonlat)
-        ], when_iso, force_fallback=True)
-
-    # Asteroids
-    for name in ASTEROIDS:
-        out[name] = resolve_body(name, [
-            ("jpl", horizons_client.get_ecliptic_lonlat),
-            ("swiss", swiss_client.get_ecliptic_lonlat),
-            ("miriade", miriade_client.get_ecliptic_lonlat)
-        ], when_iso, force_fallback=True)
-
-    # TNOs
-    for name in TNOs:
-        out[name] = resolve_body(name, [
-            ("jpl", horizons_client.get_ecliptic_lonlat),
-            ("swiss", swiss_client.get_ecliptic_lonlat),
-            ("miriade", miriade_client.get_ecliptic_lonlat)
-        ], when_iso, force_fallback=True)
-
-    # Aethers → Swiss only
-    for name in AETHERS:
-        out[name] = resolve_body(name, [("swiss", swiss_client.get_ecliptic_lonlat)],
-                                 when_iso, force_fallback=True)
+    out = {name: dict(pos) for name, pos in resolve_targets(when_iso)}
 
     # Fixed stars
-    stars = load_json(os.path.join(DATA, "fixed_stars.json"))["stars"]
-    for s in stars:
-        lam, bet = ra_dec_to_ecl(s["ra_deg"], s["dec_deg"], when_iso)
-        out[s["id"]] = {"ecl_lon_deg": lam, "ecl_lat_deg": bet, "used_source": "fixed"}
+    for star_id, lam, bet in fixed_star_lonlats():
+        out[star_id] = {"ecl_lon_deg": lam, "ecl_lat_deg": bet, "used_source": "fixed"}
 
-    out.update(compute_house_cusps(lat, lon, when_iso))
+    out.update(compute_house_cusps(lat, lon, julday_from_iso(when_iso)))
     if "ASC" in out and "Sun" in out and "Moon" in out:
         asc, sun, moon = out["ASC"]["ecl_lon_deg"], out["Sun"]["ecl_lon_deg"], out["Moon"]["ecl_lon_deg"]
         if None not in (asc, sun, moon):
@@ -158,8 +176,8 @@ def compute_positions(when_iso, lat, lon):
     out.update(compute_harmonics(out))
     return out
 
-def merge_into(natal_bundle, when_iso):
-    meta = {
+def overlay_meta(when_iso):
+    return {
         "generated_at_utc": when_iso,
         "source_order": [
             "jpl (Horizons, Sun+planets first)",
@@ -172,17 +190,20 @@ def merge_into(natal_bundle, when_iso):
             "calculated-fallback"
         ]
     }
-    charts = {}
+
+def iter_charts(natal_bundle, when_iso):
     for who, natal in natal_bundle.items():
         if who.startswith("_meta"): continue
         birth = natal.get("birth", {})
         lat, lon = birth.get("lat"), birth.get("lon")
-        charts[who] = {"birth": birth,
-                       "natal": natal.get("planets", {}),
-                       "objects": compute_positions(when_iso, lat, lon)}
-    return {"meta": meta, "charts": charts}
+        yield who, {"birth": birth,
+                    "natal": natal.get("planets", {}),
+                    "objects": compute_positions(when_iso, lat, lon)}
 
 def main(argv):
+    # Only the scheduled workflow publishes the live feed; local runs and
+    # OVERLAY_TIME_UTC backfills leave docs/feed_now.json alone.
+    publish_now = "--publish-now" in argv
     when_iso = os.environ.get("OVERLAY_TIME_UTC") or iso_now()
 
     utc_dt = parser.isoparse(when_iso).replace(tzinfo=pytz.utc)
@@ -195,12 +216,21 @@ def main(argv):
 
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     natal_bundle = load_json(NATAL)
-    merged = merge_into(natal_bundle, when_iso)
+    # Charts are written as they are computed rather than held for one dump.
+    charts = iter_charts(natal_bundle, when_iso)
+    write_json_stream(Path(out_path), {"meta": overlay_meta(when_iso)}, "charts", charts)
+
+    if not publish_now:
+        print(f"[OK] wrote overlay → {out_path}")
+        return
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(merged, f, indent=2, ensure_ascii=False)
+    # feed_now.json mirrors the newest published overlay; it is swapped in
+    # atomically so readers never see a half-written file.
+    tmp_now = FEED_NOW + ".tmp"
+    shutil.copyfile(out_path, tmp_now)
+    os.replace(tmp_now, FEED_NOW)
 
-    print(f"[OK] wrote overlay → {out_path}")
+    print(f"[OK] wrote overlay → {out_path} (+ {FEED_NOW})")
 
 if __name__ == "__main__":
     main(sys.argv[1:])
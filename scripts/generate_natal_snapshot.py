@@ -2,8 +2,8 @@
 from __future__ import annotations
 
 import argparse
-import json
 import math
+import re
 import sys
 from datetime import datetime
 from pathlib import Path
@@ -13,9 +13,12 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from scripts.fetch_ephemeris import fetch_all_positions, load_catalog
+from scripts.fetch_ephemeris import fetch_positions_for, load_catalog, set_local_majors
+from scripts.utils import cache
+from scripts.utils.jsonio import read_json, write_json
 NATAL_PATH = ROOT / "config" / "natal_profiles.json"
 OUTPUT_DIR = ROOT / "natal_charts"
+_UNSAFE_NAME_RE = re.compile(r"[\W_]")
 
 
 def _sanitize_nans(value):
@@ -33,29 +36,33 @@ def _birth_utc(profile: dict) -> datetime:
     return local.replace(tzinfo=ZoneInfo(profile["timezone"])).astimezone(ZoneInfo("UTC"))
 
 
-def _write_json(path: Path, payload: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2)
-
-
 def _safe_name(name: str) -> str:
-    return "".join(ch if ch.isalnum() else "_" for ch in name).strip("_")
+    return _UNSAFE_NAME_RE.sub("_", name).strip("_")
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Generate one-time natal snapshots")
     parser.add_argument("--person", help="Optional person name from config/natal_profiles.json")
+    parser.add_argument("--no-cache", action="store_true", help="Always query remote ephemeris services")
+    parser.add_argument(
+        "--local-majors",
+        action="store_true",
+        help="Compute Sun through Pluto from the bundled Swiss ephemeris instead of Horizons",
+    )
     args = parser.parse_args()
+    cache.set_enabled(not args.no_cache)
+    set_local_majors(args.local_majors)
 
-    profiles = json.loads(NATAL_PATH.read_text(encoding="utf-8"))
+    profiles = read_json(NATAL_PATH)
     catalog = load_catalog()
 
     selected = {args.person: profiles[args.person]} if args.person else profiles
 
-    for name, profile in selected.items():
-        birth_dt = _birth_utc(profile)
-        positions = fetch_all_positions(birth_dt, catalog=catalog)
+    birth_dts = [_birth_utc(profile) for profile in selected.values()]
+    all_positions = fetch_positions_for(birth_dts, catalog=catalog)
+
+    for name, birth_dt, positions in zip(selected, birth_dts, all_positions):
+        path = OUTPUT_DIR / f"{_safe_name(name)}_natal_snapshot.json"
         payload = _sanitize_nans(
             {
                 "person": name,
@@ -63,8 +70,7 @@ def main() -> None:
                 "positions": positions,
             }
         )
-        path = OUTPUT_DIR / f"{_safe_name(name)}_natal_snapshot.json"
-        _write_json(path, payload)
+        write_json(path, payload)
         print(f"[OK] Generated {path}")
 
 
@@ -2,14 +2,15 @@
 from __future__ import annotations
 
 import argparse
-import json
 import math
 from datetime import datetime, timezone
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
 from scripts.calculate_aspects import fixed_star_conjunctions, harmonic_aspects
-from scripts.fetch_ephemeris import fetch_all_positions, load_catalog
+from scripts.fetch_ephemeris import fetch_all_positions, load_catalog, set_local_majors
+from scripts.utils import cache
+from scripts.utils.jsonio import write_json
 
 ROOT = Path(__file__).resolve().parents[1]
 OUTPUT_DIR = ROOT / "docs"
@@ -25,6 +26,13 @@ def _sanitize_nans(value):
     return value
 
 
+def _index_by_category(positions: dict) -> dict:
+    by_category: dict = {}
+    for name, data in positions.items():
+        by_category.setdefault(data.get("category"), {})[name] = data
+    return by_category
+
+
 def utc_midnight_for_day(day: str | None = None) -> datetime:
     if day:
         parsed = datetime.strptime(day, "%Y-%m-%d")
@@ -33,33 +41,32 @@ def utc_midnight_for_day(day: str | None = None) -> datetime:
     return datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
 
 
-def _write_json(path: Path, payload: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2)
-
-
 def main() -> Path:
     parser = argparse.ArgumentParser(description="Generate daily transit snapshot")
     parser.add_argument("--date", help="UTC day in YYYY-MM-DD; defaults to current UTC day")
+    parser.add_argument("--no-cache", action="store_true", help="Always query remote ephemeris services")
+    parser.add_argument(
+        "--local-majors",
+        action="store_true",
+        help="Compute Sun through Pluto from the bundled Swiss ephemeris instead of Horizons",
+    )
     args = parser.parse_args()
+    cache.set_enabled(not args.no_cache)
+    set_local_majors(args.local_majors)
 
-    transit_dt_utc = utc_midnight_for_day(args.date) if args.date else datetime.utcnow().replace(tzinfo=timezone.utc)
+    transit_dt_utc = utc_midnight_for_day(args.date) if args.date else datetime.now(timezone.utc)
     pacific_now = transit_dt_utc.astimezone(ZoneInfo("America/Los_Angeles"))
     catalog = load_catalog()
     transit_positions = fetch_all_positions(transit_dt_utc, catalog=catalog)
+    by_category = _index_by_category(transit_positions)
 
     output = {
         "generated_at_utc": transit_dt_utc.isoformat(),
         "generated_at_pacific": pacific_now.isoformat(),
         "transit_positions": transit_positions,
         "calculated_harmonics": harmonic_aspects(transit_positions),
-        "aether_points": {
-            name: data for name, data in transit_positions.items() if data.get("category") == "aether_points"
-        },
-        "fixed_star_positions": {
-            name: data for name, data in transit_positions.items() if data.get("category") == "fixed_stars"
-        },
+        "aether_points": by_category.get("aether_points", {}),
+        "fixed_star_positions": by_category.get("fixed_stars", {}),
         "fixed_star_conjunctions": fixed_star_conjunctions(transit_positions),
     }
 
@@ -67,7 +74,7 @@ def main() -> Path:
 
     date_tag = pacific_now.strftime("%Y_%m_%d")
     output_path = OUTPUT_DIR / f"feed_overlay_{date_tag}.json"
-    _write_json(output_path, output)
+    write_json(output_path, output)
 
     print(f"[OK] Generated {output_path}")
     return output_path
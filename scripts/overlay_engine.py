@@ -4,7 +4,10 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 from typing import Any, Dict, List
 
-from scripts.fetch_ephemeris import fetch_all_positions
+from scripts.fetch_ephemeris import fetch_positions_for
+
+# fetch_ephemeris tags stars "fixed_stars"; older feeds used "fixed stars".
+FIXED_STAR_CATEGORIES = {"fixed stars", "fixed_stars"}
 
 
 def _norm_diff(a: float, b: float) -> float:
@@ -18,10 +21,11 @@ def _birth_utc(profile: Dict[str, Any]) -> datetime:
 
 
 def build_natal_positions(natal_profiles: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
-    natal_positions: Dict[str, Dict[str, Dict[str, Any]]] = {}
-    for name, profile in natal_profiles.items():
-        natal_positions[name] = fetch_all_positions(_birth_utc(profile))
-    return natal_positions
+    # Charts are independent; resolve every profile's bodies through one
+    # worker pool instead of one chart after another.
+    names = list(natal_profiles)
+    births = [_birth_utc(natal_profiles[name]) for name in names]
+    return dict(zip(names, fetch_positions_for(births)))
 
 
 def generate_overlays(
@@ -29,17 +33,21 @@ def generate_overlays(
     natal_positions: Dict[str, Dict[str, Dict[str, Any]]],
     orb: float = 2.0,
 ) -> Dict[str, List[Dict[str, Any]]]:
+    # The transit side is the same for every person; filter it once.
+    transits = [
+        (body, tpos["longitude"])
+        for body, tpos in transit_positions.items()
+        if tpos.get("longitude") is not None and tpos.get("category") not in FIXED_STAR_CATEGORIES
+    ]
     overlays: Dict[str, List[Dict[str, Any]]] = {}
     for person, natal in natal_positions.items():
         matches: List[Dict[str, Any]] = []
-        for body, tpos in transit_positions.items():
-            if tpos.get("longitude") is None or tpos.get("category") == "fixed stars":
-                continue
+        for body, transit_lon in transits:
             npos = natal.get(body)
             if not npos or npos.get("longitude") is None:
                 continue
-            delta = _norm_diff(tpos["longitude"], npos["longitude"])
+            delta = _norm_diff(transit_lon, npos["longitude"])
             if delta <= orb:
-                matches.append({"body": body, "natal_longitude": npos["longitude"], "transit_longitude": tpos["longitude"], "orb": delta})
+                matches.append({"body": body, "natal_longitude": npos["longitude"], "transit_longitude": transit_lon, "orb": delta})
         overlays[person] = matches
     return overlays
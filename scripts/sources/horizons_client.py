@@ -1,8 +1,7 @@
-from typing import Tuple, Optional
-from astroquery.jplhorizons import Horizons
-from dateutil import parser
-import swisseph as swe
-from scripts.utils.coords import ra_dec_to_ecl
+import math
+from typing import Dict, List, Tuple, Optional
+from scripts.utils.cache import cache_get, cache_set
+from scripts.utils.http import SESSION
 
 # Horizons IDs mapping
 HORIZONS_IDS = {
@@ -18,47 +17,119 @@ HORIZONS_IDS = {
     "SALACIA": "120347", "TYPHON": "42355", "2002 AW197": "55565", "2003 VS2": "84922"
 }
 
-def get_ecliptic_lonlat(target: str, when_iso: str) -> Optional[Tuple[float, float]]:
+# Positions for a given epoch never change; reruns within a week reuse them.
+CACHE_TTL_S = 7 * 24 * 3600.0
+
+HORIZONS_API = "https://ssd.jpl.nasa.gov/api/horizons.api"
+# CSV header names for the epoch (CAL_FORMAT=BOTH) and quantity 31
+# (observer ecliptic lon/lat).
+JD_COLUMN = "Date_________JDUT"
+LON_COLUMN = "ObsEcLon"
+LAT_COLUMN = "ObsEcLat"
+
+def cache_epoch(jd: float) -> float:
+    # Horizons is asked for the exact instant; only the cache key is quantized
+    # to the minute, so reruns within the same minute share an entry.
+    return round(jd * 1440.0) / 1440.0
+
+def float_or_none(value: Optional[str]) -> Optional[float]:
+    # Horizons prints "n.a." where a value is unavailable.
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+def parse_observer_csv(text: str) -> List[Dict[str, str]]:
     """
-    Query JPL Horizons for ecliptic longitude/latitude of a target.
-    Special handling for Sun.
+    Rows of a CSV observer ephemeris, each as header -> raw value.
     """
-    try:
-        tid = HORIZONS_IDS.get(target.upper(), target)
+    header = None
+    rows = []
+    in_block = False
+    for line in text.splitlines():
+        if header is None and "Date__(UT)__HR:MN" in line:
+            header = [column.strip() for column in line.split(",")]
+        elif line.startswith("$$SOE"):
+            in_block = True
+        elif line.startswith("$$EOE"):
+            break
+        elif in_block and "Cut-off" not in line:
+            rows.append([value.strip() for value in line.split(",")])
+    if header is None:
+        raise ValueError("no ephemeris header in Horizons response")
+    return [dict(zip(header, row)) for row in rows]
 
-        dt = parser.isoparse(when_iso)
-        jd = swe.julday(dt.year, dt.month, dt.day,
-                        dt.hour + dt.minute/60.0 + dt.second/3600.0)
+def ecliptic_lonlat(row: Dict[str, str]) -> Optional[Tuple[float, float]]:
+    """
+    (lon, lat) from a quantity-31 row, or None where Horizons had no usable value.
+    """
+    lon, lat = float_or_none(row.get(LON_COLUMN)), float_or_none(row.get(LAT_COLUMN))
+    return (lon, lat) if lon is not None and lat is not None else None
 
-        # Special case: Sun → request explicit geocentric ecliptic coords
-        if target.upper() == "SUN":
-            obj = Horizons(id='10', location='500@399', epochs=[jd], id_type='majorbody')
-            eph = obj.ephemerides(quantities="1,3")  # RA/DEC + ecliptic
-        else:
-            obj = Horizons(id=tid, location="500@399", epochs=[jd])
-            eph = obj.ephemerides()
+def query_observer(command: str, quantities: str, **epochs: str) -> List[Dict[str, str]]:
+    """
+    Geocentric observer ephemeris of a Horizons target, one row per epoch.
+    `epochs` is either TLIST or START_TIME/STOP_TIME/STEP_SIZE.
+    """
+    # Same observer request astroquery's ephemerides() sends, read straight
+    # from the CSV text; skips importing astropy and building a Table.
+    params = {
+        "format": "text",
+        "EPHEM_TYPE": "OBSERVER",
+        "QUANTITIES": f"'{quantities}'",
+        "COMMAND": f'"{command}"',
+        "SOLAR_ELONG": '"0,180"',
+        "LHA_CUTOFF": "0",
+        "CSV_FORMAT": "YES",
+        "CAL_FORMAT": "BOTH",
+        "ANG_FORMAT": "DEG",
+        "APPARENT": "AIRLESS",
+        "REF_SYSTEM": "ICRF",
+        "EXTRA_PREC": "NO",
+        "CENTER": "'500@399'",
+        "SKIP_DAYLT": "NO",
+        **epochs,
+    }
+    response = SESSION.get(HORIZONS_API, params=params, timeout=30)
+    response.raise_for_status()
+    return parse_observer_csv(response.text)
 
-        ecl_lon, ecl_lat = None, None
+def query_ecliptic(command: str, **epochs: str) -> List[Tuple[Optional[float], Optional[Tuple[float, float]]]]:
+    """
+    (jd, (lon, lat)) of a Horizons target per epoch; (lon, lat) is None
+    where Horizons had no usable value.
+    """
+    return [(float_or_none(row.get(JD_COLUMN)), ecliptic_lonlat(row))
+            for row in query_observer(command, "31", **epochs)]
 
-        for lon_key in ("EclLon", "EclipticLon", "ELON"):
-            if lon_key in eph.colnames:
-                ecl_lon = float(eph[lon_key][0])
-                break
-        for lat_key in ("EclLat", "EclipticLat", "ELAT"):
-            if lat_key in eph.colnames:
-                ecl_lat = float(eph[lat_key][0])
-                break
+def get_ecliptic_lonlat(target: str, when_iso: str) -> Optional[Tuple[float, float]]:
+    """
+    Query JPL Horizons for ecliptic longitude/latitude of a target.
+    """
+    # epochs pulls in the Linux "swisseph" module; keep it off this module's
+    # import path so the 6-month feed can load it under pyswisseph too.
+    from scripts.utils.epochs import julday_from_iso
+
+    try:
+        tid = HORIZONS_IDS.get(target.upper(), target)
 
-        # Convert RA/DEC if Horizons didn’t give ecliptic
-        if (ecl_lon is None or ecl_lat is None) and {"RA", "DEC"}.issubset(eph.colnames):
-            ecl_lon, ecl_lat = ra_dec_to_ecl(float(eph["RA"][0]), float(eph["DEC"][0]), when_iso)
+        jd = julday_from_iso(when_iso)
+        cache_key = [tid, cache_epoch(jd)]
+        cached = cache_get("horizons_lonlat", cache_key, max_age_s=CACHE_TTL_S)
+        if cached is not None:
+            return tuple(cached)
 
-        if ecl_lon is None or ecl_lat is None:
+        rows = query_ecliptic(tid, TLIST=repr(jd))
+        if not rows or rows[0][1] is None:
             print(f"[HORIZONS] {target} @ {when_iso} → FAILED (no ecliptic coords)")
             return None
 
+        ecl_lon, ecl_lat = rows[0][1]
         print(f"[HORIZONS] {target} @ {when_iso} → lon={ecl_lon:.6f}, lat={ecl_lat:.6f} (id={tid})")
-        return (ecl_lon % 360.0, ecl_lat)
+        result = (ecl_lon % 360.0, ecl_lat)
+        cache_set("horizons_lonlat", cache_key, result)
+        return result
 
     except Exception as e:
         print(f"[HORIZONS] Error for {target} at {when_iso}: {e}")
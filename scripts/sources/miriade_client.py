@@ -1,7 +1,7 @@
 import json
-import requests
 from typing import Tuple, Optional
 from scripts.utils.coords import ra_dec_to_ecl   # ✅ import at the top
+from scripts.utils.http import SESSION
 
 MIRIADE_BASE = "https://ssp.imcce.fr/webservices/miriade/api/ephemcc.php"
 PREFIX_MAP = {
@@ -30,7 +30,7 @@ def get_ecliptic_lonlat(name: str, when_iso: str) -> Optional[Tuple[float, float
         "-mime": "json"
     }
     try:
-        r = requests.get(MIRIADE_BASE, params=params, timeout=30)
+        r = SESSION.get(MIRIADE_BASE, params=params, timeout=30)
         data = r.json().get("result", {})
         if isinstance(data, str):
             data = json.loads(data)
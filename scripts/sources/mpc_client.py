@@ -1,13 +1,15 @@
 from typing import Tuple, Optional
 from scripts.utils.coords import ra_dec_to_ecl   # ✅ top-level import
-from astroquery.mpc import MPC                   # ✅ top-level import
+from scripts.utils.http import share_session
 
 def get_ecliptic_lonlat(name: str, when_iso: str) -> Optional[Tuple[float, float]]:
     """
     Query MPC for ephemeris and convert RA/DEC to ecliptic lon/lat.
     """
     try:
-        tab = MPC.get_ephemeris(
+        # astroquery pulls in astropy; import it only when a query is made.
+        from astroquery.mpc import MPC
+        tab = share_session(MPC).get_ephemeris(
             target=name,
             location="500",
             start=when_iso,
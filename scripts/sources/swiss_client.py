@@ -1,10 +1,20 @@
 import swisseph as swe
-from dateutil import parser
 import os
+from scripts.utils.epochs import julday_from_iso
 
 # --- Set Swiss Ephemeris data path ---
 ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-swe.set_ephe_path(os.path.join(ROOT, "ephe"))
+EPHE_DIR = os.environ.get("SE_EPHE_PATH", os.path.join(ROOT, "ephe"))
+
+def init_thread():
+    # pyswisseph keeps the ephemeris path per thread, so the importing thread
+    # and every pool worker (via its initializer) call this. Touching one body
+    # (Sun at J2000) opens and pages in the planet file up front rather than
+    # on the first fallback lookup.
+    swe.set_ephe_path(EPHE_DIR)
+    swe.calc_ut(2451545.0, swe.SUN, swe.FLG_SWIEPH)
+
+init_thread()
 
 SWISS_IDS = {
     "SUN": swe.SUN,
@@ -27,11 +37,10 @@ def get_ecliptic_lonlat(target: str, when_iso: str):
             print(f"[SWISS] Unknown target: {target}")
             return None
 
-        dt = parser.isoparse(when_iso)
-        jd = swe.julday(dt.year, dt.month, dt.day,
-                        dt.hour + dt.minute/60.0 + dt.second/3600.0)
-
-        lon, lat, dist = swe.calc_ut(jd, tid)
+        # calc_ut returns ((lon, lat, dist, speeds...), retflag).
+        # Speeds aren't used; FLG_SWIEPH alone skips computing them.
+        xx, _ = swe.calc_ut(julday_from_iso(when_iso), tid, swe.FLG_SWIEPH)
+        lon, lat, dist = xx[:3]
         print(f"[SWISS] {target.upper()} @ {when_iso} → lon={lon:.6f}, lat={lat:.6f}, dist={dist:.6f}")
         return (lon % 360.0, lat)
 
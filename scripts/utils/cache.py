@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+CACHE_DIR = ROOT / ".cache"
+
+_enabled = True
+
+
+def set_enabled(enabled: bool) -> None:
+    global _enabled
+    _enabled = enabled
+
+
+def _entry_path(namespace: str, key: Any) -> Path:
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+    return CACHE_DIR / namespace / f"{digest}.json"
+
+
+def cache_get(namespace: str, key: Any, max_age_s: Optional[float] = None) -> Optional[Any]:
+    if not _enabled:
+        return None
+    path = _entry_path(namespace, key)
+    try:
+        if max_age_s is not None and time.time() - path.stat().st_mtime > max_age_s:
+            return None
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_set(namespace: str, key: Any, value: Any) -> None:
+    if not _enabled:
+        return
+    path = _entry_path(namespace, key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial entry.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
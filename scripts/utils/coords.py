@@ -1,8 +1,15 @@
 import math
 
+import numpy as np
+
 # Obliquity of the ecliptic at J2000 (deg)
 OBLIQUITY_J2000_DEG = 23.43929111
 
+# The obliquity is fixed, so its trig terms are evaluated once at import.
+_EPS_RAD = math.radians(OBLIQUITY_J2000_DEG)
+_COS_EPS = math.cos(_EPS_RAD)
+_SIN_EPS = math.sin(_EPS_RAD)
+
 def ra_dec_to_ecl(ra_deg: float, dec_deg: float, when_iso: str = None):
     """
     Convert equatorial coordinates (RA, Dec) in degrees to
@@ -24,14 +31,13 @@ def ra_dec_to_ecl(ra_deg: float, dec_deg: float, when_iso: str = None):
     """
     ra = math.radians(ra_deg)
     dec = math.radians(dec_deg)
-    eps = math.radians(OBLIQUITY_J2000_DEG)
 
     # latitude
-    sinb = math.sin(dec) * math.cos(eps) - math.cos(dec) * math.sin(eps) * math.sin(ra)
+    sinb = math.sin(dec) * _COS_EPS - math.cos(dec) * _SIN_EPS * math.sin(ra)
     b = math.asin(sinb)
 
     # longitude
-    y = math.sin(ra) * math.cos(eps) + math.tan(dec) * math.sin(eps)
+    y = math.sin(ra) * _COS_EPS + math.tan(dec) * _SIN_EPS
     x = math.cos(ra)
     l = math.atan2(y, x)
 
@@ -39,3 +45,35 @@ def ra_dec_to_ecl(ra_deg: float, dec_deg: float, when_iso: str = None):
     lat = math.degrees(b)
 
     return lon, lat
+
+
+def ra_dec_to_ecl_many(ra_deg, dec_deg):
+    """
+    Vectorized form of :func:`ra_dec_to_ecl` for many coordinates at once.
+
+    Parameters
+    ----------
+    ra_deg : array_like
+        Right Ascensions in degrees
+    dec_deg : array_like
+        Declinations in degrees
+
+    Returns
+    -------
+    (lon_deg, lat_deg) : tuple of numpy.ndarray
+        Ecliptic longitudes and latitudes in degrees
+    """
+    ra = np.radians(np.asarray(ra_deg, dtype=float))
+    dec = np.radians(np.asarray(dec_deg, dtype=float))
+
+    sinb = np.sin(dec) * _COS_EPS - np.cos(dec) * _SIN_EPS * np.sin(ra)
+    b = np.arcsin(sinb)
+
+    y = np.sin(ra) * _COS_EPS + np.tan(dec) * _SIN_EPS
+    x = np.cos(ra)
+    l = np.arctan2(y, x)
+
+    lon = (np.degrees(l) + 360.0) % 360.0
+    lat = np.degrees(b)
+
+    return lon, lat
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import swisseph as swe
+from dateutil import parser
+
+
+@lru_cache(maxsize=32)
+def julday_from_iso(when_iso: str) -> float:
+    """Julian day (UT) for an ISO-8601 timestamp, memoized per string.
+
+    Every source lookup and house calculation in an overlay run uses the same
+    timestamp, so it is parsed and converted once.
+    """
+    dt = parser.isoparse(when_iso)
+    return swe.julday(dt.year, dt.month, dt.day,
+                      dt.hour + dt.minute/60.0 + dt.second/3600.0)
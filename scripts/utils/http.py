@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import random
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Matches the worker count used by the thread pools that share this session.
+POOL_SIZE = 8
+
+# Throttling and gateway responses (429/502/503/504) are retried with exponential backoff plus
+# jitter; a Retry-After header from the server takes precedence, capped so one
+# large value cannot stall a pool worker for as long as the server asks.
+HTTP_RETRIES = 3
+BACKOFF_BASE_S = 2.0
+BACKOFF_MAX_S = 30.0
+BACKOFF_JITTER_S = 0.5
+RETRY_AFTER_MAX_S = BACKOFF_MAX_S
+
+
+class _JitteredRetry(Retry):
+    def get_backoff_time(self) -> float:
+        attempts = len(self.history)
+        if attempts == 0:
+            return 0.0
+        delay = BACKOFF_BASE_S * (2 ** (attempts - 1)) + random.uniform(0, BACKOFF_JITTER_S)
+        return min(BACKOFF_MAX_S, delay)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(RETRY_AFTER_MAX_S, retry_after)
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    retries = _JitteredRetry(
+        total=HTTP_RETRIES,
+        connect=0,
+        read=0,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# One keep-alive session per process so repeated Horizons/Miriade queries
+# reuse the TCP/TLS connection instead of handshaking on every call.
+SESSION = _build_session()
+
+
+def share_session(query):
+    """Route an astroquery service instance through the shared connection pool.
+
+    The shared adapter (pool + retries) is mounted on astroquery's own
+    session, so its User-Agent and other headers are kept.
+    """
+    for prefix in ("https://", "http://"):
+        query._session.mount(prefix, SESSION.get_adapter(prefix))
+    return query
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple
+
+# orjson is an optional speedup; the stdlib encoder is the fallback. The two
+# produce the same JSON values but not the same bytes: orjson writes
+# non-ASCII text as raw UTF-8 (json escapes it as \uXXXX) and formats
+# small and large floats differently (0.00001 and 1e-7 where json writes
+# 1e-05 and 1e-07).
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def read_json(path: Path) -> Any:
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Feeds are read by the app, not by people; compact output is smaller and
+# faster to encode than indented output.
+_SEPARATORS = (",", ":")
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=_SEPARATORS).encode("utf-8")
+
+
+def write_json(path: Path, payload: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Readers may pick the file up at any time; never expose a partial write.
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        tmp.write_bytes(_dumps(payload))
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def write_json_stream(path: Path, header: Dict[str, Any], key: str, items: Iterable[Tuple[str, Any]]) -> None:
+    """Write ``{**header, key: dict(items)}`` one item at a time.
+
+    The output matches ``write_json`` of the assembled mapping, but only a
+    single item is held in memory while writing.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Items are produced while writing, so a failure part-way would leave a
+    # truncated file; write beside the target and rename when complete.
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with tmp.open("wb") as f:
+            f.write(_dumps(header)[:-1] + b"," if header else b"{")
+            f.write(_dumps(key) + b":{")
+            first = True
+            for item_key, value in items:
+                f.write((b"" if first else b",") + _dumps(item_key) + b":" + _dumps(value))
+                first = False
+            f.write(b"}}")
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,24 @@
+import importlib
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    # The feed module points Swiss Ephemeris at ./ephe when imported.
+    monkeypatch.chdir(ROOT)
+    return importlib.import_module("scripts.generate_feed_6month")
+
+
+@pytest.mark.parametrize("body, command", [
+    ("Ceres", "1;"), ("Pallas", "2;"), ("Juno", "3;"), ("Vesta", "4;"),
+])
+def test_asteroids_are_queried_as_small_bodies(feed, monkeypatch, body, command):
+    sent = []
+    monkeypatch.setattr(feed.horizons_client, "query_ecliptic",
+                        lambda cmd, **epochs: sent.append(cmd) or [])
+    feed.query_jpl_ecliptic(body, 2461000.5, 2461001.5, 1)
+    assert sent == [command]